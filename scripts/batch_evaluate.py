@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Batch RAG Answer Evaluation
+============================
+Scores large sets of answers (generated question variants, historical chat
+logs, saved benchmark runs) offline with the same rules as
+benchmark_rag.evaluate_response(), without calling the endpoint.
+
+Each answer is only checked against its own question's keywords (C-level
+substring searches), answers are scored in a process pool and written as
+one row per answer.
+
+Input formats (JSON list or JSONL):
+    - questions: same shape as BENCHMARK_QUESTIONS
+      (id, question, category, expected_keywords, should_have_no_answer)
+    - answers: either saved benchmark results ({"question": {...}, "result": {...}})
+      or flat records ({"question_id": 1, "answer": "...", "sources": [...]})
+
+Usage:
+    python3 scripts/batch_evaluate.py benchmark_results_*.json
+    python3 scripts/batch_evaluate.py answers.jsonl --questions variants.jsonl --output scores.csv
+    python3 scripts/batch_evaluate.py answers.jsonl --output scores.parquet --workers 8
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from benchmark_rag import BENCHMARK_QUESTIONS, evaluate_response
+
+OUTPUT_COLUMNS = [
+    "question_id",
+    "category",
+    "has_answer",
+    "has_sources",
+    "answer_length",
+    "source_count",
+    "keywords_found",
+    "keywords_expected",
+    "quality_score",
+]
+
+def load_records(path: str) -> List[Dict]:
+    """Load a JSON list or JSONL file into a list of dicts."""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+def load_questions(paths: List[str]) -> Dict:
+    """Load question sets keyed by question id (defaults to BENCHMARK_QUESTIONS)."""
+    questions = {}
+    if not paths:
+        return {q["id"]: q for q in BENCHMARK_QUESTIONS}
+    for path in paths:
+        for q in load_records(path):
+            questions[q["id"]] = q
+    return questions
+
+def load_answers(paths: List[str], questions: Dict) -> List[Tuple]:
+    """
+    Load answer records as (question_id, result) pairs.
+
+    Questions embedded in saved benchmark results are added to `questions`
+    when they are not already defined by the question set.
+    """
+    answers = []
+    for path in paths:
+        for record in load_records(path):
+            if isinstance(record.get("question"), dict):
+                question = record["question"]
+                questions.setdefault(question["id"], question)
+                question_id = question["id"]
+                result = record.get("result", {})
+            else:
+                question_id = record.get("question_id", record.get("id"))
+                result = record
+
+            answers.append((question_id, {
+                "answer": result.get("answer") or "",
+                "sources": result.get("sources") or [],
+            }))
+    return answers
+
+# Per-process state, set once by _init_worker so each task only ships answers
+_worker_questions: Dict = {}
+
+def _init_worker(questions: Dict):
+    global _worker_questions
+    _worker_questions = questions
+
+def _score_chunk(chunk: List[Tuple]) -> List[Dict]:
+    rows = []
+    for question_id, result in chunk:
+        question_data = _worker_questions.get(question_id)
+        if question_data is None:
+            continue
+        evaluation = evaluate_response(question_data, result)
+        rows.append({
+            "question_id": question_id,
+            "category": question_data.get("category", ""),
+            "has_answer": evaluation["has_answer"],
+            "has_sources": evaluation["has_sources"],
+            "answer_length": evaluation["answer_length"],
+            "source_count": evaluation["source_count"],
+            "keywords_found": evaluation["keywords_found"],
+            "keywords_expected": len(question_data.get("expected_keywords", [])),
+            "quality_score": evaluation["quality_score"],
+        })
+    return rows
+
+def score_answers(answers: List[Tuple], questions: Dict, workers: int = 0, chunk_size: int = 500) -> List[Dict]:
+    """Score answers in a process pool (workers=0 uses all cores, workers=1 scores in-process)."""
+    if workers < 0:
+        raise ValueError(f"workers must be >= 0, got {workers}")
+    chunks = [answers[i:i + chunk_size] for i in range(0, len(answers), chunk_size)]
+
+    if workers == 1 or len(chunks) <= 1:
+        _init_worker(questions)
+        return [row for chunk in chunks for row in _score_chunk(chunk)]
+
+    rows = []
+    with ProcessPoolExecutor(
+        max_workers=workers or None,
+        initializer=_init_worker,
+        initargs=(questions,)
+    ) as executor:
+        for chunk_rows in executor.map(_score_chunk, chunks):
+            rows.extend(chunk_rows)
+    return rows
+
+def write_rows(rows: List[Dict], output_file: str):
+    """Write scored rows as CSV, or Parquet when the path ends in .parquet."""
+    if output_file.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("❌ Error: Parquet output requires pyarrow (pip install pyarrow)")
+            sys.exit(1)
+        columns = {name: [row[name] for row in rows] for name in OUTPUT_COLUMNS}
+        pq.write_table(pa.table(columns), output_file)
+        return
+
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def print_summary(rows: List[Dict], skipped: int, elapsed: float):
+    print(f"\n{'='*80}")
+    print(f"BATCH EVALUATION SUMMARY")
+    print(f"{'='*80}\n")
+
+    if not rows:
+        print("❌ No answers matched a known question id")
+        return
+
+    avg_score = sum(r["quality_score"] for r in rows) / len(rows)
+    print(f"📊 Answers scored: {len(rows)}")
+    if skipped:
+        print(f"⚠️  Skipped (unknown question id): {skipped}")
+    print(f"📊 Average quality score: {avg_score:.1f}/100")
+    print(f"⏱️  Scoring time: {elapsed:.2f}s ({len(rows) / max(elapsed, 1e-9):,.0f} answers/s)")
+
+    categories = {}
+    for r in rows:
+        categories.setdefault(r["category"], []).append(r["quality_score"])
+
+    print()
+    for cat, scores in sorted(categories.items()):
+        avg_cat_score = sum(scores) / len(scores)
+        emoji = "✅" if avg_cat_score >= 70 else "⚠️" if avg_cat_score >= 40 else "❌"
+        print(f"{emoji} {cat:20s}: {avg_cat_score:.1f}/100 ({len(scores)} answers)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch-score RAG answers offline")
+    parser.add_argument("answers", nargs="+", help="Answer files (JSON list or JSONL)")
+    parser.add_argument(
+        "--questions",
+        nargs="*",
+        default=[],
+        help="Question set files (default: BENCHMARK_QUESTIONS)"
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Output file (.csv or .parquet, default: batch_scores_<timestamp>.csv)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Worker processes (0 = all cores, 1 = no pool)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=500, help="Answers per worker task")
+
+    args = parser.parse_args()
+    if args.workers < 0:
+        parser.error("--workers must be >= 0")
+
+    questions = load_questions(args.questions)
+    answers = load_answers(args.answers, questions)
+    print(f"📚 Loaded {len(questions)} questions and {len(answers)} answers")
+
+    start_time = time.time()
+    rows = score_answers(answers, questions, args.workers, args.chunk_size)
+    elapsed = time.time() - start_time
+
+    print_summary(rows, len(answers) - len(rows), elapsed)
+
+    output_file = args.output or f"batch_scores_{int(time.time())}.csv"
+    write_rows(rows, output_file)
+    print(f"\n📄 Scores saved to: {output_file}")
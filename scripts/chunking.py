@@ -0,0 +1,41 @@
+"""
+Chunking and embedding configuration shared by the knowledge-base scripts
+(generate_embeddings.py, profile_chunking.py). Depends only on tiktoken, so
+it can be imported without the OpenAI/Pinecone SDKs.
+"""
+
+from typing import List
+
+import tiktoken
+
+# Configuration
+CHUNK_SIZE = 500  # tokens
+CHUNK_OVERLAP = 50  # tokens
+EMBEDDING_MODEL = "text-embedding-3-small"
+PINECONE_DIMENSION = 1536  # for text-embedding-3-small
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Count tokens in text using tiktoken."""
+    encoding = tiktoken.encoding_for_model(model)
+    return len(encoding.encode(text))
+
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Split text into overlapping chunks of approximately chunk_size tokens.
+    """
+    encoding = tiktoken.encoding_for_model("gpt-4o-mini")
+    tokens = encoding.encode(text)
+    
+    chunks = []
+    start = 0
+    
+    while start < len(tokens):
+        end = start + chunk_size
+        chunk_tokens = tokens[start:end]
+        chunk_text = encoding.decode(chunk_tokens)
+        chunks.append(chunk_text)
+        
+        # Move start forward by (chunk_size - overlap)
+        start += (chunk_size - overlap)
+        
+    return chunks
@@ -16,6 +16,9 @@ import json
 import os
 from typing import List, Dict
 import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Install dependencies if needed
 try:
@@ -27,40 +30,9 @@ except ImportError:
     from openai import OpenAI
     from pinecone import Pinecone, ServerlessSpec
 
-import tiktoken
+from chunking import CHUNK_OVERLAP, CHUNK_SIZE, EMBEDDING_MODEL, PINECONE_DIMENSION, chunk_text, count_tokens
 
-# Configuration
-CHUNK_SIZE = 500  # tokens
-CHUNK_OVERLAP = 50  # tokens
-EMBEDDING_MODEL = "text-embedding-3-small"
 PINECONE_INDEX_NAME = "rd-consultant-kb"
-PINECONE_DIMENSION = 1536  # for text-embedding-3-small
-
-def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
-    """Count tokens in text using tiktoken."""
-    encoding = tiktoken.encoding_for_model(model)
-    return len(encoding.encode(text))
-
-def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
-    """
-    Split text into overlapping chunks of approximately chunk_size tokens.
-    """
-    encoding = tiktoken.encoding_for_model("gpt-4o-mini")
-    tokens = encoding.encode(text)
-    
-    chunks = []
-    start = 0
-    
-    while start < len(tokens):
-        end = start + chunk_size
-        chunk_tokens = tokens[start:end]
-        chunk_text = encoding.decode(chunk_tokens)
-        chunks.append(chunk_text)
-        
-        # Move start forward by (chunk_size - overlap)
-        start += (chunk_size - overlap)
-        
-    return chunks
 
 def generate_embeddings(texts: List[str], api_key: str) -> List[List[float]]:
     """Generate embeddings using OpenAI API."""
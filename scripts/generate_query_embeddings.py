@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Hot Query Embedding Cache
+==========================
+Precomputes embeddings for frequently asked questions (benchmark questions,
+the UI's STARTER_QUESTIONS from src/lib/constants.ts, popular user queries)
+so they skip the OpenAI embedding round trip before vector search.
+
+Embeddings are written to a compact binary file (float32) that src/lib/rag.ts
+loads into an in-memory map at startup. QueryEmbeddingCache serves the same
+file from Python and falls back to batched embedding calls for misses.
+
+File layout (little-endian):
+    magic b"QEMB" | version u16 | dimension u32 | count u32
+    model name: u16 length + utf-8 bytes
+    count x (u32 length + utf-8 query text)
+    count x dimension float32 values
+
+The output is not committed. The Docker build generates it when the key is
+passed as a build secret (see Dockerfile):
+    docker build --secret id=OPENAI_API_KEY,env=OPENAI_API_KEY .
+For local development, run the script once; rag.ts picks the file up from
+knowledge/ (or QUERY_EMBEDDINGS_PATH).
+
+Usage:
+    python3 scripts/generate_query_embeddings.py
+    python3 scripts/generate_query_embeddings.py --questions popular.json
+
+Environment variables required:
+    - OPENAI_API_KEY
+"""
+
+import argparse
+import json
+import os
+import re
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from benchmark_rag import BENCHMARK_QUESTIONS
+from generate_embeddings import EMBEDDING_MODEL, PINECONE_DIMENSION, generate_embeddings
+
+QUERY_EMBEDDINGS_PATH = "knowledge/query_embeddings.bin"
+STARTER_QUESTIONS_PATH = "src/lib/constants.ts"
+
+FILE_MAGIC = b"QEMB"
+FILE_VERSION = 1
+
+def normalize_query(text: str) -> str:
+    """Cache key for a query; must match normalizeQuery() in src/lib/rag.ts."""
+    return " ".join(text.split())
+
+def load_starter_questions(path: str = STARTER_QUESTIONS_PATH) -> List[str]:
+    """Read STARTER_QUESTIONS from the UI constants so the two never drift apart."""
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    match = re.search(r"STARTER_QUESTIONS\s*=\s*\[(.*?)\]", source, re.DOTALL)
+    if not match:
+        raise ValueError(f"STARTER_QUESTIONS not found in {path}")
+    return [json.loads(s) for s in re.findall(r'"(?:[^"\\]|\\.)*"', match.group(1))]
+
+def load_hot_questions(paths: List[str]) -> List[str]:
+    """
+    Load the benchmark and starter questions plus any extra hot-question JSON
+    files (a list of strings or of dicts with a "question" field),
+    deduplicated in order.
+    """
+    questions = [q["question"] for q in BENCHMARK_QUESTIONS] + load_starter_questions()
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for item in json.load(f):
+                questions.append(item["question"] if isinstance(item, dict) else item)
+
+    seen = set()
+    unique = []
+    for q in questions:
+        key = normalize_query(q)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(key)
+    return unique
+
+def write_query_embeddings(path: str, queries: List[str], embeddings: List[List[float]], model: str = EMBEDDING_MODEL):
+    """Write queries and their embeddings in the binary cache format."""
+    dimension = len(embeddings[0]) if embeddings else PINECONE_DIMENSION
+    model_bytes = model.encode('utf-8')
+
+    with open(path, 'wb') as f:
+        f.write(FILE_MAGIC)
+        f.write(struct.pack("<HII", FILE_VERSION, dimension, len(queries)))
+        f.write(struct.pack("<H", len(model_bytes)))
+        f.write(model_bytes)
+        for query in queries:
+            encoded = query.encode('utf-8')
+            f.write(struct.pack("<I", len(encoded)))
+            f.write(encoded)
+
+        values = array('f')
+        for embedding in embeddings:
+            if len(embedding) != dimension:
+                raise ValueError(f"Embedding dimension {len(embedding)} != {dimension}")
+            values.extend(embedding)
+        if sys.byteorder != "little":
+            values.byteswap()
+        values.tofile(f)
+
+def read_query_embeddings(path: str) -> Dict:
+    """Read a binary cache file into {"model", "dimension", "embeddings": {query: array}}."""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if data[:4] != FILE_MAGIC:
+        raise ValueError(f"{path} is not a query embedding file")
+    version, dimension, count = struct.unpack_from("<HII", data, 4)
+    if version != FILE_VERSION:
+        raise ValueError(f"Unsupported query embedding file version {version}")
+    offset = 14
+    (model_len,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    model = data[offset:offset + model_len].decode('utf-8')
+    offset += model_len
+
+    queries = []
+    for _ in range(count):
+        (length,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        queries.append(data[offset:offset + length].decode('utf-8'))
+        offset += length
+
+    values = array('f')
+    values.frombytes(data[offset:offset + count * dimension * 4])
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    embeddings = {
+        query: values[i * dimension:(i + 1) * dimension]
+        for i, query in enumerate(queries)
+    }
+    return {"model": model, "dimension": dimension, "embeddings": embeddings}
+
+class QueryEmbeddingCache:
+    """
+    In-memory query -> embedding map backed by the precomputed file.
+    Misses are embedded in one batched call and kept for the process lifetime.
+    """
+
+    def __init__(self, path: str = QUERY_EMBEDDINGS_PATH, api_key: Optional[str] = None):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.embeddings: Dict[str, List[float]] = {}
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            cached = read_query_embeddings(path)
+            if cached["model"] == EMBEDDING_MODEL:
+                self.embeddings = {q: list(v) for q, v in cached["embeddings"].items()}
+
+    def get(self, query: str) -> List[float]:
+        return self.get_many([query])[0]
+
+    def get_many(self, queries: List[str]) -> List[List[float]]:
+        keys = [normalize_query(q) for q in queries]
+        missing = list(dict.fromkeys(k for k in keys if k not in self.embeddings))
+        miss_count = sum(1 for k in keys if k not in self.embeddings)
+        self.hits += len(keys) - miss_count
+        self.misses += miss_count
+
+        if missing:
+            if not self.api_key:
+                raise RuntimeError("OPENAI_API_KEY is required to embed uncached queries")
+            for key, embedding in zip(missing, generate_embeddings(missing, self.api_key)):
+                self.embeddings[key] = embedding
+
+        return [self.embeddings[k] for k in keys]
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute embeddings for hot questions")
+    parser.add_argument(
+        "--questions",
+        nargs="*",
+        default=[],
+        help="Extra hot question files (JSON list), in addition to the benchmark and starter questions"
+    )
+    parser.add_argument("--output", default=QUERY_EMBEDDINGS_PATH, help="Binary output file")
+    args = parser.parse_args()
+
+    openai_key = os.getenv("OPENAI_API_KEY")
+    if not openai_key:
+        print("❌ Error: OPENAI_API_KEY not found in environment variables")
+        print("Set it with: export OPENAI_API_KEY='your-key-here'")
+        return
+
+    questions = load_hot_questions(args.questions)
+    print(f"📚 Loaded {len(questions)} hot questions")
+
+    # Reuse embeddings already in the output file so reruns only embed new questions
+    cache = QueryEmbeddingCache(args.output, openai_key)
+    reused = sum(1 for q in questions if q in cache.embeddings)
+    print(f"♻️  Reusing {reused} cached embeddings")
+
+    print(f"\n🔧 Generating embeddings with {EMBEDDING_MODEL}...")
+    embeddings = cache.get_many(questions)
+
+    write_query_embeddings(args.output, questions, embeddings)
+    size_kb = os.path.getsize(args.output) / 1024
+    print(f"\n✅ Saved {len(questions)} query embeddings to {args.output} ({size_kb:.1f} KB)")
+
+if __name__ == "__main__":
+    main()
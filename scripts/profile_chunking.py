@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Chunking Profiler
+==================
+Sweeps chunking parameters and strategies over knowledge/sources.json and
+reports, per configuration:
+    - chunk count and token-length histogram
+    - overlap waste (tokens embedded more than once)
+    - duplicate ratio (chunks whose text repeats another chunk)
+    - projected embedding cost and Pinecone index size
+    - context tokens per query (TOP_K_RESULTS chunk previews, as sent by src/lib/rag.ts)
+    - with --recall: keyword recall@k of the benchmark questions against a
+      local TF-IDF index built from the chunks (a lexical proxy for retrieval
+      quality that needs no API calls)
+
+Configurations are profiled in parallel, one per process.
+
+Strategies:
+    tokens      fixed token windows, as used by generate_embeddings.py
+    paragraphs  whole paragraphs packed up to chunk_size tokens, overlapping
+                by trailing paragraphs; oversized paragraphs fall back to windows
+
+Usage:
+    python3 scripts/profile_chunking.py
+    python3 scripts/profile_chunking.py --chunk-sizes 300 500 800 --overlaps 0 50 100 --recall
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from chunking import CHUNK_OVERLAP, CHUNK_SIZE, PINECONE_DIMENSION, chunk_text
+
+import tiktoken
+
+STRATEGIES = ["tokens", "paragraphs"]
+HISTOGRAM_EDGES = [100, 200, 300, 400, 500, 750, 1000, 1500]  # inclusive upper bounds
+# "0-100", "101-200", ..., ">1500": a chunk of exactly chunk_size tokens lands in the bucket ending at it
+HISTOGRAM_BUCKETS = [
+    f"{lo + 1 if lo else 0}-{hi}" for lo, hi in zip([0] + HISTOGRAM_EDGES, HISTOGRAM_EDGES)
+] + [f">{HISTOGRAM_EDGES[-1]}"]
+EMBEDDING_PRICE_PER_1M = 0.02  # $ per 1M tokens, text-embedding-3-small
+TOP_K_RESULTS = 5  # matches src/lib/rag.ts
+PREVIEW_CHARS = 500  # chunk text stored in metadata and sent as context
+TERM_PREFIX = 5  # crude stemming for the TF-IDF index: first N chars of each word
+
+# Per-process state, set once by _init_worker
+_sources: List[Dict] = []
+_questions: List[Dict] = []
+_encoding = None
+
+def _init_worker(sources: List[Dict], questions: List[Dict]):
+    global _sources, _questions, _encoding
+    _sources = sources
+    _questions = questions
+    _encoding = tiktoken.encoding_for_model("gpt-4o-mini")
+
+def chunk_paragraphs(text: str, chunk_size: int, overlap: int) -> List[str]:
+    """
+    Pack whole paragraphs into chunks of up to chunk_size tokens, counting the
+    "\n\n" separators. Trailing paragraphs of a chunk (up to overlap tokens)
+    are repeated at the start of the next one when they still fit.
+    """
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    separator_tokens = len(_encoding.encode("\n\n"))
+
+    def size(parts):
+        return sum(t for _, t in parts) + separator_tokens * max(len(parts) - 1, 0)
+
+    chunks = []
+    current = []  # (paragraph, token count)
+
+    for paragraph in paragraphs:
+        n_tokens = len(_encoding.encode(paragraph))
+        if n_tokens > chunk_size:
+            if current:
+                chunks.append("\n\n".join(p for p, _ in current))
+                current = []
+            chunks.extend(chunk_text(paragraph, chunk_size, overlap))
+            continue
+
+        if current and size(current + [(paragraph, n_tokens)]) > chunk_size:
+            chunks.append("\n\n".join(p for p, _ in current))
+            # Carry trailing paragraphs that fit in the overlap budget
+            carried = []
+            for item in reversed(current):
+                if size([item] + carried) > overlap:
+                    break
+                carried.insert(0, item)
+            # Drop carried paragraphs (oldest first) until the new one fits
+            while carried and size(carried + [(paragraph, n_tokens)]) > chunk_size:
+                carried.pop(0)
+            current = carried
+
+        current.append((paragraph, n_tokens))
+
+    if current:
+        chunks.append("\n\n".join(p for p, _ in current))
+    return chunks
+
+def _terms(text: str) -> List[str]:
+    return [w[:TERM_PREFIX] for w in re.findall(r"\w+", text.lower()) if len(w) > 1]
+
+def keyword_recall(chunks: List[str], questions: List[Dict], top_k: int = TOP_K_RESULTS) -> float:
+    """
+    Mean fraction of each question's expected keywords found in the previews
+    of its top_k chunks under a TF-IDF index over the chunks.
+    """
+    previews = [c[:PREVIEW_CHARS] for c in chunks]
+    chunk_terms = [Counter(_terms(c)) for c in chunks]
+    doc_freq = Counter(term for terms in chunk_terms for term in terms)
+    n_chunks = len(chunks)
+    idf = {term: math.log(n_chunks / df) + 1 for term, df in doc_freq.items()}
+
+    # Inverted index: term -> [(chunk index, weight)], weights L2-normalized per chunk
+    postings: Dict[str, List] = {}
+    for i, terms in enumerate(chunk_terms):
+        weights = {t: (1 + math.log(tf)) * idf[t] for t, tf in terms.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        for t, w in weights.items():
+            postings.setdefault(t, []).append((i, w / norm))
+
+    recalls = []
+    for q in questions:
+        keywords = q.get("expected_keywords", [])
+        if not keywords:
+            continue
+        scores = Counter()
+        for term in set(_terms(q["question"])):
+            for i, w in postings.get(term, []):
+                scores[i] += w * idf[term]
+        context = " ".join(previews[i] for i, _ in scores.most_common(top_k)).lower()
+        recalls.append(sum(1 for k in keywords if k.lower() in context) / len(keywords))
+
+    return sum(recalls) / len(recalls) if recalls else 0.0
+
+def profile_config(config: Dict) -> Dict:
+    """Chunk every source with one configuration and measure the result."""
+    strategy, chunk_size, overlap = config["strategy"], config["chunk_size"], config["overlap"]
+    start_time = time.time()
+
+    chunks = []
+    metadata_bytes = 0
+    source_tokens = 0
+    for source in _sources:
+        if strategy == "tokens":
+            source_chunks = chunk_text(source["content"], chunk_size, overlap)
+        else:
+            source_chunks = chunk_paragraphs(source["content"], chunk_size, overlap)
+        source_tokens += len(_encoding.encode(source["content"]))
+
+        for i, chunk in enumerate(source_chunks):
+            metadata_bytes += len(json.dumps({
+                "source_id": source["source_id"],
+                "title": source["title"],
+                "chunk_index": i,
+                "total_chunks": len(source_chunks),
+                "text": chunk[:PREVIEW_CHARS]
+            }, ensure_ascii=False).encode("utf-8"))
+        chunks.extend(source_chunks)
+
+    token_lengths = [len(_encoding.encode(c)) for c in chunks]
+    embedded_tokens = sum(token_lengths)
+    preview_tokens = [len(_encoding.encode(c[:PREVIEW_CHARS])) for c in chunks]
+
+    histogram = Counter()
+    for n in token_lengths:
+        index = next((i for i, edge in enumerate(HISTOGRAM_EDGES) if n <= edge), len(HISTOGRAM_EDGES))
+        histogram[HISTOGRAM_BUCKETS[index]] += 1
+
+    normalized = Counter(" ".join(c.split()).lower() for c in chunks)
+    duplicates = sum(count - 1 for count in normalized.values() if count > 1)
+
+    result = {
+        **config,
+        "chunk_count": len(chunks),
+        "tokens_min": min(token_lengths, default=0),
+        "tokens_mean": embedded_tokens / len(chunks) if chunks else 0,
+        "tokens_max": max(token_lengths, default=0),
+        "histogram": {b: histogram.get(b, 0) for b in HISTOGRAM_BUCKETS},
+        "embedded_tokens": embedded_tokens,
+        "overlap_waste": (embedded_tokens - source_tokens) / source_tokens if source_tokens else 0,
+        "duplicate_ratio": duplicates / len(chunks) if chunks else 0,
+        "embedding_cost": embedded_tokens / 1_000_000 * EMBEDDING_PRICE_PER_1M,
+        "index_size_bytes": len(chunks) * PINECONE_DIMENSION * 4 + metadata_bytes,
+        "context_tokens_per_query": TOP_K_RESULTS * (sum(preview_tokens) / len(chunks)) if chunks else 0,
+        "recall": keyword_recall(chunks, _questions) if _questions and chunks else None,
+    }
+    result["profile_time"] = time.time() - start_time
+    return result
+
+def print_report(results: List[Dict]):
+    print(f"\n{'='*100}")
+    print(f"CHUNKING PROFILE")
+    print(f"{'='*100}\n")
+
+    has_recall = any(r["recall"] is not None for r in results)
+    header = f"{'strategy':10s} {'size':>5s} {'ovl':>4s} {'chunks':>7s} {'mean tok':>8s} {'waste':>6s} {'dup':>6s} {'cost $':>7s} {'index MB':>9s} {'ctx tok':>7s}"
+    if has_recall:
+        header += f" {'recall':>6s}"
+    print(header)
+    print("-" * len(header))
+
+    for r in results:
+        line = (f"{r['strategy']:10s} {r['chunk_size']:5d} {r['overlap']:4d} {r['chunk_count']:7d} "
+                f"{r['tokens_mean']:8.0f} {r['overlap_waste']:6.1%} {r['duplicate_ratio']:6.1%} "
+                f"{r['embedding_cost']:7.4f} {r['index_size_bytes'] / 1_048_576:9.2f} "
+                f"{r['context_tokens_per_query']:7.0f}")
+        if has_recall:
+            line += f" {r['recall']:6.1%}" if r["recall"] is not None else f" {'-':>6s}"
+        print(line)
+
+    print(f"\n{'='*100}")
+    print(f"TOKEN-LENGTH HISTOGRAMS")
+    print(f"{'='*100}\n")
+
+    for r in results:
+        print(f"{r['strategy']} size={r['chunk_size']} overlap={r['overlap']}")
+        peak = max(r["histogram"].values()) or 1
+        for bucket, count in r["histogram"].items():
+            if count:
+                print(f"   {bucket:>9s} | {'█' * max(1, round(count / peak * 40))} {count}")
+        print()
+
+    # Smallest index among configs within 2 points of the best recall
+    candidates = results
+    if has_recall:
+        # Configs without chunks have no recall and are never recommended
+        measured = [r for r in results if r["recall"] is not None]
+        best_recall = max(r["recall"] for r in measured)
+        candidates = [r for r in measured if r["recall"] >= best_recall - 0.02]
+    best = min(candidates, key=lambda r: (r["index_size_bytes"], r["context_tokens_per_query"]))
+    print(f"💡 Smallest index{' at near-best recall' if has_recall else ''}: "
+          f"{best['strategy']} size={best['chunk_size']} overlap={best['overlap']} "
+          f"({best['chunk_count']} chunks, {best['index_size_bytes'] / 1_048_576:.2f} MB)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile chunking parameters over the knowledge base")
+    parser.add_argument("--sources", default="knowledge/sources.json", help="Knowledge base file")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[250, CHUNK_SIZE, 750, 1000])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[0, CHUNK_OVERLAP, 100])
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument("--recall", action="store_true", help="Measure keyword recall@k of the benchmark questions")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0 = all cores)")
+    parser.add_argument("--output", default=None, help="JSON output file (default: chunking_profile_<timestamp>.json)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.sources):
+        print(f"❌ Error: {args.sources} not found")
+        return
+
+    with open(args.sources, 'r', encoding='utf-8') as f:
+        sources = json.load(f)
+    print(f"📚 Loaded {len(sources)} sources from knowledge base")
+
+    questions = []
+    if args.recall:
+        from benchmark_rag import BENCHMARK_QUESTIONS
+        questions = BENCHMARK_QUESTIONS
+
+    configs = [
+        {"strategy": strategy, "chunk_size": size, "overlap": overlap}
+        for strategy, size, overlap in product(args.strategies, args.chunk_sizes, args.overlaps)
+        if overlap < size
+    ]
+    print(f"🔧 Profiling {len(configs)} configurations...")
+
+    start_time = time.time()
+    with ProcessPoolExecutor(
+        max_workers=args.workers or None,
+        initializer=_init_worker,
+        initargs=(sources, questions)
+    ) as executor:
+        results = list(executor.map(profile_config, configs))
+    print(f"⏱️  Done in {time.time() - start_time:.1f}s")
+
+    print_report(results)
+
+    output_file = args.output or f"chunking_profile_{int(time.time())}.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n📄 Full results saved to: {output_file}")
+
+if __name__ == "__main__":
+    main()
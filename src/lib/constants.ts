@@ -1,3 +1,5 @@
+// Also read by scripts/generate_query_embeddings.py, which precomputes their
+// embeddings; rerun it after changing this list.
 export const STARTER_QUESTIONS = [
     "Можно ли учесть зарплату директора в НИОКР?",
     "Какие документы нужны для списания материалов?",
@@ -1,3 +1,5 @@
+import fs from 'fs';
+import path from 'path';
 import { ChatResponse } from './types';
 import { Message } from './types'; // Import Message from types
 
@@ -7,6 +9,10 @@ const EMBEDDING_MODEL = 'text-embedding-3-small';
 const CHAT_MODEL = 'gpt-4o'; // Upgraded for better reasoning and "human" feel
 const TOP_K_RESULTS = 5;
 const API_TIMEOUT_MS = 60000; // 60 seconds timeout for all API calls
+// Precomputed embeddings for hot questions (scripts/generate_query_embeddings.py)
+const QUERY_EMBEDDINGS_PATH = process.env.QUERY_EMBEDDINGS_PATH
+    || path.join(process.cwd(), 'knowledge', 'query_embeddings.bin');
+const MAX_RUNTIME_QUERY_EMBEDDINGS = 500; // embeddings computed at runtime kept in memory
 
 const CONSULTANT_PERSONA = `You are an AI consultant specialized in Russian R&D (NIОKR) accounting and defensibility. You advise on: (1) tax accounting of R&D expenses, (2) financial accounting treatment (expense vs capitalization and allocation), (3) statistical reporting when relevant, and (4) contract/SOW/TZ wording that affects recognition and audit/tax risks.
 
@@ -200,9 +206,96 @@ async function contextualizeQuery(messages: Message[]): Promise<string> {
 
 
 /**
- * Generate embedding for a text query using OpenAI
+ * Cache key for a query; must match normalize_query() in scripts/generate_query_embeddings.py
+ */
+function normalizeQuery(query: string): string {
+    return query.trim().split(/\s+/).join(' ');
+}
+
+let precomputedQueryEmbeddings: Map<string, number[]> | null = null;
+const runtimeQueryEmbeddings = new Map<string, number[]>();
+
+/**
+ * Load the precomputed query embedding file into memory (once).
+ * See scripts/generate_query_embeddings.py for the file layout.
+ */
+function loadPrecomputedQueryEmbeddings(): Map<string, number[]> {
+    if (precomputedQueryEmbeddings) return precomputedQueryEmbeddings;
+    precomputedQueryEmbeddings = new Map();
+
+    if (!fs.existsSync(QUERY_EMBEDDINGS_PATH)) return precomputedQueryEmbeddings;
+
+    try {
+        const data = fs.readFileSync(QUERY_EMBEDDINGS_PATH);
+        if (data.toString('latin1', 0, 4) !== 'QEMB' || data.readUInt16LE(4) !== 1) {
+            throw new Error('unsupported file format');
+        }
+        const dimension = data.readUInt32LE(6);
+        const count = data.readUInt32LE(10);
+        let offset = 14;
+        const modelLength = data.readUInt16LE(offset);
+        offset += 2;
+        const model = data.toString('utf8', offset, offset + modelLength);
+        offset += modelLength;
+
+        if (model !== EMBEDDING_MODEL) {
+            console.warn(`[RAG] Ignoring query embeddings for model ${model} (expected ${EMBEDDING_MODEL})`);
+            return precomputedQueryEmbeddings;
+        }
+
+        const queries: string[] = [];
+        for (let i = 0; i < count; i++) {
+            const length = data.readUInt32LE(offset);
+            offset += 4;
+            queries.push(data.toString('utf8', offset, offset + length));
+            offset += length;
+        }
+
+        queries.forEach((query, i) => {
+            const embedding = new Array<number>(dimension);
+            const base = offset + i * dimension * 4;
+            for (let j = 0; j < dimension; j++) {
+                embedding[j] = data.readFloatLE(base + j * 4);
+            }
+            precomputedQueryEmbeddings!.set(query, embedding);
+        });
+
+        console.log(`[RAG] Loaded ${count} precomputed query embeddings`);
+    } catch (error) {
+        console.error('[RAG] Failed to load precomputed query embeddings:', error);
+        precomputedQueryEmbeddings = new Map();
+    }
+
+    return precomputedQueryEmbeddings;
+}
+
+/**
+ * Get the embedding for a text query: precomputed hot questions and recently
+ * embedded queries are served from memory, anything else goes to OpenAI.
  */
 async function generateQueryEmbedding(query: string): Promise<number[]> {
+    const key = normalizeQuery(query);
+    const cached = loadPrecomputedQueryEmbeddings().get(key) ?? runtimeQueryEmbeddings.get(key);
+    if (cached) {
+        console.log('[RAG] Query embedding cache hit');
+        return cached;
+    }
+
+    const embedding = await fetchQueryEmbedding(key);
+
+    // Bounded: drop the oldest entry once full (Map keeps insertion order)
+    if (runtimeQueryEmbeddings.size >= MAX_RUNTIME_QUERY_EMBEDDINGS) {
+        const oldest = runtimeQueryEmbeddings.keys().next().value;
+        if (oldest !== undefined) runtimeQueryEmbeddings.delete(oldest);
+    }
+    runtimeQueryEmbeddings.set(key, embedding);
+    return embedding;
+}
+
+/**
+ * Generate embedding for a text query using OpenAI
+ */
+async function fetchQueryEmbedding(query: string): Promise<number[]> {
     const controller = new AbortController();
     const timeoutId = setTimeout(() => controller.abort(), API_TIMEOUT_MS);
 
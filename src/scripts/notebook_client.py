@@ -3,10 +3,26 @@ import json
 import subprocess
 import os
 import re
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 
 NOTEBOOK_ID = "53e585fb-63e8-4432-b245-db2584895a6e"
 SERVER_CMD = ["/Users/shakhgildyangy/.venv/bin/python", "-m", "notebooklm_mcp.server"]
 
+STARTUP_TIMEOUT = 30  # seconds for the server to finish the handshake and answer a probe
+PROBE_INTERVAL = 0.5  # seconds between tools/list readiness probes
+SERVE_WORKERS = 8  # concurrent upstream calls in --serve mode
+
+# stderr lines that mean the server will never become ready (crash, auth check failed)
+STARTUP_FAILURE_RE = re.compile(
+    r"^Traceback|^\w+(Error|Exception):|auth(entication)? (failed|required|expired)|not authenticated",
+    re.IGNORECASE | re.MULTILINE
+)
+
 CONSULTANT_PERSONA = """
 Отвечай как профессиональный консультант по учету НИОКР и налогообложению. 
 Твой тон: практичный, экспертный, помогающий решить проблему. 
@@ -62,125 +78,468 @@ def clean_text(text):
     
     return text.strip()
 
-def run_query(query_text, conversation_id=None):
-    # Wrap query with persona
-    full_query = CONSULTANT_PERSONA + query_text
+class ServerStartupError(RuntimeError):
+    """The MCP server could not be started or never became ready."""
+
+
+class McpServer:
+    """
+    A notebooklm-mcp server process speaking JSON-RPC over stdio.
+
+    stdout and stderr are drained by background threads into one event queue,
+    so a crash or a fatal log line during startup is noticed as soon as it
+    happens instead of after a fixed sleep.
+    """
+
+    def __init__(self, cmd, env):
+        self.started_at = time.monotonic()
+        self.cold_start_ms = None
+        try:
+            self.process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=env,
+                text=True,
+                bufsize=1
+            )
+        except OSError as e:
+            raise ServerStartupError(f"Failed to start notebooklm-mcp server: {e}") from e
+        if not self.process.stdin or not self.process.stdout:
+            raise ServerStartupError("Failed to start notebooklm-mcp server")
+
+        self._events = queue.Queue()
+        self._stderr_lines = []
+        self._next_id = 0
+        self._ready = False
+        threading.Thread(target=self._pump, args=("stdout", self.process.stdout), daemon=True).start()
+        threading.Thread(target=self._pump, args=("stderr", self.process.stderr), daemon=True).start()
+
+    def _pump(self, stream_name, stream):
+        for line in stream:
+            if stream_name == "stderr":
+                self._stderr_lines.append(line)
+            self._events.put((stream_name, line))
+        self._events.put((stream_name + "_eof", None))
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def stderr_output(self):
+        return "".join(self._stderr_lines).strip() or "No stderr"
+
+    def _drain_stderr(self, grace=0.2):
+        """Give the rest of a traceback a moment to arrive before reporting it."""
+        deadline = time.monotonic() + grace
+        while time.monotonic() < deadline:
+            try:
+                self._events.get(timeout=deadline - time.monotonic())
+            except queue.Empty:
+                break
+
+    def _send(self, message):
+        try:
+            self.process.stdin.write(json.dumps(message) + "\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            # BrokenPipeError: the server exited or closed stdin
+            self._drain_stderr()
+            raise ServerStartupError(f"Lost connection to server: {e} | stderr: {self.stderr_output()}") from e
+
+    def send_request(self, method, params):
+        self._next_id += 1
+        self._send({"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params})
+        return self._next_id
+
+    def notify(self, method, params):
+        self._send({"jsonrpc": "2.0", "method": method, "params": params})
+
+    def wait_for(self, request_ids, deadline=None):
+        """
+        Wait for a response to any of request_ids.
+
+        Returns the response dict, or None if the deadline passes first.
+        Raises ServerStartupError if the process exits, or if it logs a fatal
+        error to stderr before it is ready.
+        """
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                stream_name, line = self._events.get(timeout=remaining)
+            except queue.Empty:
+                return None
+
+            if stream_name == "stdout_eof":
+                self.process.wait()
+                raise ServerStartupError(
+                    f"Process exited with code {self.process.returncode} | stderr: {self.stderr_output()}"
+                )
+            if stream_name == "stderr":
+                if not self._ready and STARTUP_FAILURE_RE.search(line):
+                    self._drain_stderr()
+                    raise ServerStartupError(f"Server failed during startup | stderr: {self.stderr_output()}")
+                continue
+            if stream_name != "stdout":
+                continue
+
+            try:
+                resp = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(resp, dict) and resp.get("id") in request_ids:
+                return resp
 
+    def request(self, method, params, deadline=None):
+        request_id = self.send_request(method, params)
+        return self.wait_for({request_id}, deadline)
+
+    def wait_until_ready(self, timeout=STARTUP_TIMEOUT):
+        """
+        Run the initialize handshake, then probe with tools/list until the
+        server answers. Records the cold-start latency in cold_start_ms.
+        """
+        deadline = self.started_at + timeout
+
+        resp = self.request("initialize", {
+            "protocolVersion": "2024-11-05", "capabilities": {},
+            "clientInfo": {"name": "rd-consultant-client", "version": "1.0"}
+        }, deadline)
+        if resp is None:
+            raise ServerStartupError(f"No initialize response within {timeout}s | stderr: {self.stderr_output()}")
+        if "error" in resp:
+            raise ServerStartupError(f"initialize failed: {resp['error']}")
+        self.notify("notifications/initialized", {})
+
+        # A cheap probe: the server is ready once it answers tools/list.
+        # Unanswered probes stay outstanding, so a late reply still counts.
+        probe_ids = set()
+        while True:
+            probe_ids.add(self.send_request("tools/list", {}))
+            resp = self.wait_for(probe_ids, min(deadline, time.monotonic() + PROBE_INTERVAL))
+            if resp is not None and "error" not in resp:
+                break
+            if time.monotonic() >= deadline:
+                raise ServerStartupError(f"Server not ready within {timeout}s | stderr: {self.stderr_output()}")
+
+        self._ready = True
+        self.cold_start_ms = round((time.monotonic() - self.started_at) * 1000)
+
+    def close(self):
+        if self.alive:
+            self.process.terminate()
+
+
+def start_server(timeout=STARTUP_TIMEOUT):
+    """Start a notebooklm-mcp server and return it once it is initialized and ready."""
     # The notebooklm-mcp-cli package installs a 'notebooklm-mcp' command
     # which is the MCP server we need to run
-    import shutil
     cli_cmd = shutil.which("notebooklm-mcp")
-    
     if not cli_cmd:
-        return {"error": "notebooklm-mcp command not found. Is notebooklm-mcp-cli installed?"}
-    
-    # The command requires 'server' subcommand to start the MCP server
-    cmd = [cli_cmd, "server"]
+        raise ServerStartupError("notebooklm-mcp command not found. Is notebooklm-mcp-cli installed?")
 
+    # The command requires 'server' subcommand to start the MCP server.
     # Pass environment variables (including potential NOTEBOOKLM_COOKIES)
-    env = os.environ.copy()
-
-    process = subprocess.Popen(
-        cmd,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,  # Capture stderr for debugging
-        env=env,
-        text=True,
-        bufsize=0
-    )
-
-    # Check if process started successfully
-    if not process or not process.stdin or not process.stdout:
-        return {"error": "Failed to start notebooklm-mcp server"}
-    
-    # Give process a moment to fail if it's going to
-    import time
-    time.sleep(0.5)
-    
-    # Check if process is still alive
-    if process.poll() is not None:
-        # Process already exited
-        stderr_output = process.stderr.read() if process.stderr else "No stderr"
-        return {"error": f"Process exited immediately with code {process.returncode} | stderr: {stderr_output}"}
-
+    server = McpServer([cli_cmd, "server"], os.environ.copy())
     try:
-        # 1. Initialize
-        process.stdin.write(json.dumps({
-            "jsonrpc": "2.0", "id": 1, "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05", "capabilities": {},
-                "clientInfo": {"name": "rd-consultant-client", "version": "1.0"}
-            }
-        }) + "\n")
-        process.stdin.flush()
+        server.wait_until_ready(timeout)
+    except Exception:
+        server.close()
+        raise
+    return server
 
-        while True:
-            line = process.stdout.readline()
-            if not line: break
+
+class ServerPrefetcher:
+    """
+    Starts a server ahead of demand so the next query gets one that is
+    already initialized. acquire() hands over the warm server (or starts one
+    if none is pending) and, by default, begins warming the next one.
+    """
+
+    def __init__(self, timeout=STARTUP_TIMEOUT):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = None
+
+    def prefetch(self):
+        with self._lock:
+            if self._pending is None:
+                self._pending = self._executor.submit(start_server, self.timeout)
+
+    def acquire(self, prefetch_next=True):
+        """Return a ready server; the caller owns it and must close() it."""
+        with self._lock:
+            pending, self._pending = self._pending, None
+
+        server = None
+        if pending is not None:
             try:
-                resp = json.loads(line)
-                if resp.get("id") == 1:
-                    process.stdin.write(json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized", "params": {}}) + "\n")
-                    process.stdin.flush()
-                    break
-            except: continue
+                server = pending.result()
+            except Exception:
+                server = None
+            # A warm server that died while idle is replaced with a fresh one
+            if server is not None and not server.alive:
+                server = None
+
+        warm = server is not None
+        if server is None:
+            server = start_server(self.timeout)
 
-        # 2. Call Tool
+        if prefetch_next:
+            self.prefetch()
+        return server, warm
+
+    def close(self):
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            pending.add_done_callback(_close_prefetched)
+        self._executor.shutdown(wait=False)
+
+
+def _close_prefetched(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def run_query(query_text, conversation_id=None, prefetcher=None):
+    # Wrap query with persona
+    full_query = CONSULTANT_PERSONA + query_text
+
+    requested_at = time.monotonic()
+    try:
+        if prefetcher:
+            server, warm = prefetcher.acquire()
+        else:
+            server, warm = start_server(), False
+    except Exception as e:
+        return {"error": str(e)}
+
+    metrics = {
+        "cold_start_ms": server.cold_start_ms,
+        "prefetched": warm,
+        "server_wait_ms": round((time.monotonic() - requested_at) * 1000)
+    }
+
+    try:
         args = {"notebook_id": NOTEBOOK_ID, "query": full_query}
         if conversation_id:
             args["conversation_id"] = conversation_id
 
-        process.stdin.write(json.dumps({
-            "jsonrpc": "2.0", "id": 2, "method": "tools/call",
-            "params": {
-                "name": "notebook_query",
-                "arguments": args
-            }
-        }) + "\n")
-        process.stdin.flush()
+        resp = server.request("tools/call", {
+            "name": "notebook_query",
+            "arguments": args
+        })
+        if resp is None:
+            return {"error": f"No response from server | stderr: {server.stderr_output()}", "metrics": metrics}
+        if "error" in resp:
+            return {"error": str(resp["error"]), "metrics": metrics}
 
-        while True:
-            line = process.stdout.readline()
-            if not line: break
-            try:
-                resp = json.loads(line)
-                if resp.get("id") == 2:
-                    if "error" in resp: return {"error": str(resp["error"])}
-                    
-                    result_data = resp.get("result", {})
-                    content = result_data.get("content", [])
-                    text = "".join([i.get("text", "") for i in content if i.get("type") == "text"])
-                    
-                    # Also try to get conversation_id from result if it's there
-                    resp_conv_id = result_data.get("conversation_id")
-                    
-                    return {
-                        "answer": clean_text(text),
-                        "conversation_id": resp_conv_id
-                    }
-            except: continue
+        result_data = resp.get("result", {})
+        content = result_data.get("content", [])
+        text = "".join([i.get("text", "") for i in content if i.get("type") == "text"])
+
+        # Also try to get conversation_id from result if it's there
+        resp_conv_id = result_data.get("conversation_id")
+
+        return {
+            "answer": clean_text(text),
+            "conversation_id": resp_conv_id,
+            "metrics": metrics
+        }
 
     except Exception as e:
-        # Try to read stderr for more details
-        error_msg = str(e)
-        if process and process.stderr:
-            try:
-                stderr_output = process.stderr.read()
-                if stderr_output:
-                    error_msg = f"{error_msg} | stderr: {stderr_output}"
-            except:
-                pass
-        return {"error": error_msg}
+        return {"error": f"{e} | stderr: {server.stderr_output()}", "metrics": metrics}
     finally:
-        if process:
-            process.terminate()
+        server.close()
+
+
+def normalize_query(query_text):
+    """Key used to detect identical questions: case- and whitespace-insensitive."""
+    return " ".join(query_text.split()).lower()
+
+
+class NotebookService:
+    """
+    Resident notebook client shared by concurrent callers.
+
+    Identical in-flight queries without a conversation_id share one upstream
+    call and every caller gets the answer (single-flight). Only the caller
+    that made the upstream call keeps the new conversation_id; coalesced
+    callers get None, so separate users never share a NotebookLM
+    conversation and a follow-up from them starts a fresh one.
+
+    Queries within a conversation are queued and run one at a time in
+    arrival order. Waiting never occupies a worker thread: coalesced callers
+    are completed by a callback on the shared call, and a conversation's
+    queue is drained by a single task. Unrelated requests therefore only
+    compete for workers with requests that are actually calling upstream.
+    """
+
+    def __init__(self, workers=SERVE_WORKERS, prefetch=True):
+        self.prefetcher = ServerPrefetcher()
+        if prefetch:
+            self.prefetcher.prefetch()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._conversations = {}  # conversation_id -> deque of (query_text, Future)
+        self.stats = {"upstream_calls": 0, "coalesced": 0}
+
+    def _upstream(self, query_text, conversation_id):
+        with self._lock:
+            self.stats["upstream_calls"] += 1
+        return run_query(query_text, conversation_id, self.prefetcher)
+
+    def query(self, query_text, conversation_id=None):
+        """Blocking convenience wrapper around submit()."""
+        return self.submit(query_text, conversation_id).result()
+
+    def submit(self, query_text, conversation_id=None):
+        """Schedule a query and return a Future for its result dict."""
+        if conversation_id:
+            return self._submit_in_conversation(query_text, conversation_id)
+
+        key = normalize_query(query_text)
+        with self._lock:
+            upstream = self._inflight.get(key)
+            is_leader = upstream is None
+            if is_leader:
+                upstream = self._executor.submit(self._upstream, query_text, None)
+                self._inflight[key] = upstream
+            else:
+                self.stats["coalesced"] += 1
+
+        if is_leader:
+            upstream.add_done_callback(lambda f: self._forget_inflight(key, f))
+        return _derived_future(upstream, lambda result: _fan_out(result, not is_leader))
+
+    def _forget_inflight(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _submit_in_conversation(self, query_text, conversation_id):
+        future = Future()
+        with self._lock:
+            pending = self._conversations.get(conversation_id)
+            start_drain = pending is None
+            if start_drain:
+                pending = self._conversations[conversation_id] = deque()
+            pending.append((query_text, future))
+
+        if start_drain:
+            self._executor.submit(self._drain_conversation, conversation_id)
+        return future
+
+    def _drain_conversation(self, conversation_id):
+        """Run a conversation's queued queries in order; the only task for it."""
+        while True:
+            with self._lock:
+                pending = self._conversations[conversation_id]
+                if not pending:
+                    del self._conversations[conversation_id]
+                    return
+                query_text, future = pending.popleft()
+
+            try:
+                future.set_result(self._upstream(query_text, conversation_id))
+            except Exception as e:
+                future.set_exception(e)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.prefetcher.close()
+
+
+def _fan_out(result, coalesced):
+    """Per-caller copy of a shared result."""
+    result = dict(result)
+    if coalesced and "conversation_id" in result:
+        result["conversation_id"] = None
+    if "metrics" in result:
+        result["metrics"] = dict(result["metrics"], coalesced=coalesced)
+    return result
+
+
+def _derived_future(source, transform):
+    """A Future completed with transform(source.result()) once source is done."""
+    derived = Future()
+
+    def complete(f):
+        try:
+            derived.set_result(transform(f.result()))
+        except Exception as e:
+            derived.set_exception(e)
+
+    source.add_done_callback(complete)
+    return derived
+
+
+def serve(workers=SERVE_WORKERS):
+    """
+    Run as a resident service: read one JSON request per line from stdin
+    ({"id": ..., "query": ..., "conversation_id": ...}) and write one JSON
+    response per line to stdout, tagged with the same id. Requests are
+    handled concurrently, so responses may arrive out of order.
+    """
+    service = NotebookService(workers)
+    write_lock = threading.Lock()
+    outstanding = []
+
+    def respond(result, request_id=None):
+        with write_lock:
+            print(json.dumps(dict(result, id=request_id), ensure_ascii=False), flush=True)
+
+    def on_done(future, request_id):
+        # Always answer, so a caller never waits forever on a request id
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {"error": str(e)}
+        respond(result, request_id)
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            respond({"error": "Invalid JSON request"})
+            continue
+        if not isinstance(request, dict):
+            respond({"error": "Request must be a JSON object"})
+            continue
+
+        request_id = request.get("id")
+        query_text = request.get("query")
+        if not query_text:
+            respond({"error": "No query provided"}, request_id)
+            continue
+        try:
+            future = service.submit(query_text, request.get("conversation_id"))
+        except Exception as e:
+            respond({"error": str(e)}, request_id)
+            continue
+        future.add_done_callback(lambda f, request_id=request_id: on_done(f, request_id))
+        outstanding.append(future)
+
+    wait(outstanding)
+    service.close()
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print(json.dumps({"error": "No query provided"}))
         sys.exit(1)
-        
+
+    if sys.argv[1] == "--serve":
+        serve()
+        sys.exit(0)
+
     query = sys.argv[1]
     conv_id = sys.argv[2] if len(sys.argv) > 2 else None
     